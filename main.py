@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import os
 import time
 import subprocess
@@ -15,6 +16,43 @@ from .config import PluginConfig
 from .service import JMCosmosService
 
 
+def _split_args(event: AstrMessageEvent, maxsplit: int = -1):
+    """拆分指令参数；split() 自带首尾空白处理，无需再 strip"""
+    return event.message_str.split(maxsplit=maxsplit)
+
+
+@functools.lru_cache(maxsize=128)
+def _cover_image(path: str, _mtime_ns: int) -> Image:
+    """按 (路径, mtime) 记忆化封面组件，热门封面反复展示时免重复读盘构建"""
+    return Image.fromFileSystem(path)
+
+
+def _cover_image_for(path: str) -> Image:
+    return _cover_image(path, os.stat(path).st_mtime_ns)
+
+
+# jmstat 称号 -> (统计用TAG, 展示用称号)，模块级常量避免每次调用重建
+_STAT_TAG_MAP = {
+    "妹控": ("兄妹", "妹控"),
+    "ntr之王": ("NTR", "NTR"),
+    "最爱开大车": ("年上", "最爱开大车"),
+    "骨科": ("乱伦", "骨科"),
+    "炼铜": ("萝莉", "炼铜"),
+}
+
+# jmstat 用法说明，缺参与未知动作两处共用同一份常量
+_JMSTAT_USAGE = (
+    "用法:\n/jmstat 最多下载用户\n "
+    "/jmstat 最多下载漫画\n"
+    "/jmstat 妹控\n"
+    "/jmstat NTR之王\n"
+    "/jmstat 最爱开大车\n"
+    "/jmstat 骨科\n"
+    "/jmstat 炼铜\n"
+    "/jmstat 自定义 [自定义TAG]"
+)
+
+
 @register(
     "jm_cosmos",
     "zhoufan47",
@@ -43,15 +81,12 @@ class JMCosmosPlugin(Star):
             await asyncio.to_thread(time.sleep, 2)
             self.service = await asyncio.to_thread(JMCosmosService, self.cfg, "jm_cosmos", self.db_path)
 
-            # 加载性癖调查HTML模板
-            template_path = os.path.join(os.path.dirname(__file__), 'templates', 'investigation_report.html')
-            if os.path.exists(template_path):
-                with open(template_path, 'r', encoding='utf-8') as f:
-                    self._report_template = f.read()
-                self.service.report_template = self._report_template
-                logger.info(f"性癖调查模板已加载: {template_path}")
+            # 性癖调查HTML模板已在 Service 初始化时加载，直接复用避免重复读盘
+            self._report_template = self.service.report_template
+            if self._report_template:
+                logger.info("性癖调查模板已加载")
             else:
-                logger.warning(f"性癖调查模板文件不存在: {template_path}")
+                logger.warning("性癖调查模板加载失败或不存在")
 
             logger.info("JmCosmos 异步初始化完成……")
         except Exception as e:
@@ -61,26 +96,33 @@ class JMCosmosPlugin(Star):
         """插件卸载时调用"""
         await self.service.shutdown()
 
-    @filter.command("jm")
-    async def cmd_download(self, event: AstrMessageEvent,comic_id:str):
-        """下载漫画: /jm [ID]"""
+    async def _download_stats_message(self, comic_id: str):
+        """查询下载历史并返回 (下载次数, 提示文本)；查询用户信息失败时文本为 None"""
+        count = await asyncio.to_thread(self.service.db.get_comic_download_count, comic_id)
+        if count <= 0:
+            return count, None
+        last_download_user_id = await asyncio.to_thread(self.service.db.get_last_download_user, comic_id)
+        first_download_user_id = await asyncio.to_thread(self.service.db.get_first_download_user, comic_id)
+        last_user = await asyncio.to_thread(self.service.db.get_user_by_id, last_download_user_id)
+        first_user = await asyncio.to_thread(self.service.db.get_user_by_id, first_download_user_id)
+        try:
+            return count, (
+                f"漫画[{comic_id}]已经被下载了 {count} 次，首次下载用户是 {first_user.UserName} ,上一次下载用户是 {last_user.UserName} ")
+        except Exception as e:
+            logger.error(f"获取用户信息失败: {e}")
+            return count, None
+
+    async def _run_download_flow(self, event: AstrMessageEvent, comic_id: str, warn_yaoi: bool):
+        """下载漫画并发送结果的公共流程，供指令与LLM工具复用"""
         sender_id = event.get_sender_id()
         sender_name = event.get_sender_name()
 
         # 发送"开始下载"的提示
         yield event.plain_result(f"⏳ 开始请求下载 [{comic_id}]...")
-        count = self.service.db.get_comic_download_count(comic_id)
-        if count > 0:
-            last_download_user_id = self.service.db.get_last_download_user(comic_id)
-            first_download_user_id = self.service.db.get_first_download_user(comic_id)
-            last_user = self.service.db.get_user_by_id(last_download_user_id)
-            first_user = self.service.db.get_user_by_id(first_download_user_id)
-            try:
-                yield event.plain_result(
-                    f"漫画[{comic_id}]已经被下载了 {count} 次，首次下载用户是 {first_user.UserName} ,上一次下载用户是 {last_user.UserName} ")
-            except Exception as e:
-                logger.error(f"获取用户信息失败: {e}")
-        else:
+        count, stats_msg = await self._download_stats_message(comic_id)
+        if stats_msg:
+            yield event.plain_result(stats_msg)
+        elif count <= 0:
             yield event.plain_result(f"漫画[{comic_id}]是第一次下载,你发现了新大陆！")
         # 调用业务层
         result_msg = await self.service.download_comic(comic_id, sender_id, sender_name)
@@ -92,7 +134,7 @@ class JMCosmosPlugin(Star):
             logger.info(f"已生成文件 [{pdf_path}]")
             # 2. 获取漫画详情 (用于 Discord 推送信息)
             info, cover_path = await self.service.get_comic_info(comic_id)
-            if info and "yaoi" in info.tags:
+            if warn_yaoi and info and "yaoi" in info.tags:
                 yield event.plain_result(f"‼警告‼：检测到[{comic_id}]含有[yaoi]标签！这是黑车！")
             # 3. 推送到 Discord
             if info and pdf_path:
@@ -112,13 +154,20 @@ class JMCosmosPlugin(Star):
                 except Exception as e:
                     logger.error(f"推送到 Discord 失败: {e}")
             if pdf_path:
-                file_size_mb = await asyncio.to_thread(os.path.getsize, pdf_path) / (1024 * 1024)
-                if file_size_mb > 90:
-                    yield event.plain_result(f"⚠️ 文件较大 ({file_size_mb:.2f}MB)，可能发送失败。")
+                # 一次 stat 拿字节数，整数比较即可，仅在告警分支才换算 MB
+                file_bytes = (await asyncio.to_thread(os.stat, pdf_path)).st_size
+                if file_bytes > 90 * 1024 * 1024:
+                    yield event.plain_result(f"⚠️ 文件较大 ({file_bytes / (1024 * 1024):.2f}MB)，可能发送失败。")
 
                 # 直接发送文件组件，AstrBot 会自动处理适配器逻辑
                 yield event.chain_result([File(name=f"{comic_id}.pdf", file=pdf_path)])
 
+    @filter.command("jm")
+    async def cmd_download(self, event: AstrMessageEvent,comic_id:str):
+        """下载漫画: /jm [ID]"""
+        async for result in self._run_download_flow(event, comic_id, warn_yaoi=True):
+            yield result
+
 
     @filter.llm_tool(name="download_comic")
     async def tool_download(self, event: AstrMessageEvent,comic_id:str)-> MessageEventResult:
@@ -127,71 +176,19 @@ class JMCosmosPlugin(Star):
         Args:
             comic_id(string): 本子ID、漫画ID
         '''
-        sender_id = event.get_sender_id()
-        sender_name = event.get_sender_name()
-
-        # 发送"开始下载"的提示
-        yield event.plain_result(f"⏳ 开始请求下载 [{comic_id}]...")
-        count = self.service.db.get_comic_download_count(comic_id)
-        if count > 0:
-            last_download_user_id = self.service.db.get_last_download_user(comic_id)
-            first_download_user_id = self.service.db.get_first_download_user(comic_id)
-            last_user = self.service.db.get_user_by_id(last_download_user_id)
-            first_user = self.service.db.get_user_by_id(first_download_user_id)
-            try:
-                yield event.plain_result(
-                    f"漫画[{comic_id}]已经被下载了 {count} 次，首次下载用户是 {first_user.UserName} ,上一次下载用户是 {last_user.UserName} ")
-            except Exception as e:
-                logger.error(f"获取用户信息失败: {e}")
-        else:
-            yield event.plain_result(f"漫画[{comic_id}]是第一次下载,你发现了新大陆！")
-        # 调用业务层
-        result_msg = await self.service.download_comic(comic_id, sender_id, sender_name)
-        yield event.plain_result(result_msg)
-
-        # 如果成功，尝试发送文件
-        if "✅" in result_msg:
-            pdf_path = await self.service.get_pdf_file(comic_id)
-            logger.info(f"已生成文件 [{pdf_path}]")
-            # 2. 获取漫画详情 (用于 Discord 推送信息)
-            info, cover_path = await self.service.get_comic_info(comic_id)
-
-
-            # 3. 推送到 Discord
-            if info and pdf_path:
-                try:
-                    # 构造 info 消息列表 (discordPoster通常接收一个组件列表或字符串)
-                    if self.cfg.is_discord_post:
-                        await discordPoster.post_to_discord(
-                            comic_id,
-                            f"{info.id}-{info.title}",
-                            info.to_display_string(),
-                            info.tags,
-                            cover_path if cover_path else "",  # 确保不传 None
-                            pdf_path,
-                            api_url=self.cfg.discord_post_api_url
-                        )
-                        logger.info(f"已推送漫画 [{comic_id}] 到 Discord")
-                except Exception as e:
-                    logger.error(f"推送到 Discord 失败: {e}")
-            if pdf_path:
-                file_size_mb = await asyncio.to_thread(os.path.getsize, pdf_path) / (1024 * 1024)
-                if file_size_mb > 90:
-                    yield event.plain_result(f"⚠️ 文件较大 ({file_size_mb:.2f}MB)，可能发送失败。")
-
-                # 直接发送文件组件，AstrBot 会自动处理适配器逻辑
-                yield event.chain_result([File(name=f"{comic_id}.pdf", file=pdf_path)])
+        async for result in self._run_download_flow(event, comic_id, warn_yaoi=False):
+            yield result
 
 
     @filter.command("xp大调查")
     async def cmd_investigate(self, event: AstrMessageEvent):
         """调查指定用户的性癖: /jm大调查 @用户"""
-        # 从消息中提取@的用户ID
-        target_user_id = None
-        for comp in event.message_obj.message:
-            if isinstance(comp, At) and comp.qq != 'all':
-                target_user_id = str(comp.qq)
-                break
+        # 从消息中提取@的用户ID，生成器按需遍历，命中即停
+        target_user_id = next(
+            (str(comp.qq) for comp in event.message_obj.message
+             if isinstance(comp, At) and comp.qq != 'all'),
+            None,
+        )
 
         if not target_user_id:
             yield event.plain_result("❌ 请@一个用户，例如: /jm大调查 @小明")
@@ -232,20 +229,13 @@ class JMCosmosPlugin(Star):
 
         components = []
         yield event.plain_result(info.to_display_string())
-        count = self.service.db.get_comic_download_count(comic_id)
-        if count > 0:
-            last_download_user_id = self.service.db.get_last_download_user(comic_id)
-            first_download_user_id = self.service.db.get_first_download_user(comic_id)
-            last_user = self.service.db.get_user_by_id(last_download_user_id)
-            first_user = self.service.db.get_user_by_id(first_download_user_id)
-            try:
-                yield event.plain_result(
-                    f"漫画[{comic_id}]已经被下载了 {count} 次，首次下载用户是 {first_user.UserName} ,上一次下载用户是 {last_user.UserName} ")
-            except Exception as e:
-                logger.error(f"获取用户信息失败: {e}")
+        _, stats_msg = await self._download_stats_message(comic_id)
+        if stats_msg:
+            yield event.plain_result(stats_msg)
         if self.cfg.show_cover and cover_path:
             logger.info(f"已获取漫画的封面 [{cover_path}] 的信息")
-            components.append(Image.fromFileSystem(cover_path))
+            # 组件构造会读取封面文件，放到线程中执行避免阻塞事件循环
+            components.append(await asyncio.to_thread(_cover_image_for, cover_path))
         yield event.chain_result(components)
 
     @filter.command("jmpassword")
@@ -262,16 +252,27 @@ class JMCosmosPlugin(Star):
         yield event.plain_result(f"当前密码【{current_password}】")
 
 
+    async def _iter_search_pages(self, query: str, max_pages: int = 3):
+        """逐页搜索的异步生成器，每页请求在线程中执行，避免阻塞事件循环"""
+        for page in range(1, max_pages + 1):
+            yield await asyncio.to_thread(self.service.provider.search_site, query, page)
+
     @filter.command("jmsearch")
     async def cmd_search(self, event: AstrMessageEvent):
         """搜索: /jmsearch [关键词]"""
-        args = event.message_str.strip().split()
+        args = _split_args(event, maxsplit=2)
         if len(args) < 2:
             return
 
         query = args[1]
-        # 直接调用 Provider 的搜索 (或者封装在 Service 中) - 使用 asyncio.to_thread 包装同步操作
-        results = await asyncio.to_thread(self.service.provider.search_site, query)
+        # 逐页流式获取，凑够展示数量即停止翻页
+        results = []
+        async for page_results in self._iter_search_pages(query):
+            if not page_results:
+                break
+            results.extend(page_results)
+            if len(results) >= 10:
+                break
 
         if not results:
             yield event.plain_result("未找到相关结果。")
@@ -286,7 +287,7 @@ class JMCosmosPlugin(Star):
     @filter.command("jmlogin")
     async def cmd_login(self, event: AstrMessageEvent):
         """登录JM帐号: /jmlogin [用户名] [密码] (不带参数则使用配置)"""
-        args = event.message_str.strip().split()
+        args = _split_args(event, maxsplit=3)
 
         # 默认使用配置中的账号密码
         username = self.cfg.jm_username
@@ -332,18 +333,9 @@ class JMCosmosPlugin(Star):
         /jmstat 炼铜
         """
 
-        args = event.message_str.strip().split()
+        args = _split_args(event, maxsplit=3)
         if len(args) < 2:
-            yield event.plain_result(
-                "用法:\n/jmstat 最多下载用户\n "
-                "/jmstat 最多下载漫画\n"
-                "/jmstat 妹控\n"
-                "/jmstat NTR之王\n"
-                "/jmstat 最爱开大车\n"
-                "/jmstat 骨科\n"
-                "/jmstat 炼铜\n"
-                "/jmstat 自定义 [自定义TAG]"
-            )
+            yield event.plain_result(_JMSTAT_USAGE)
             return
         action = args[1].lower()
         if action == "最多下载用户":
@@ -355,41 +347,14 @@ class JMCosmosPlugin(Star):
         elif action == "最多下载漫画":
             comic_id = await asyncio.to_thread(self.service.db.query_most_download_comic)
             yield event.plain_result(f"噔噔噔！⭐️截止今天，下载最多次数的漫画是{comic_id}]")
-        elif action == "妹控":
-            user_id = await asyncio.to_thread(self.service.db.get_most_download_user_id_by_tag, "兄妹")
-            if user_id is None:
-                yield event.plain_result(f"哎呀！没有找到【妹控】指数最高的用户");
-                return
-            user = await asyncio.to_thread(self.service.db.get_user_by_id, user_id)
-            yield event.plain_result(f"噔噔噔！⭐️截止今天，【妹控】指数最高的用户是{user.UserName}[{user.UserId}]")
-        elif action == "NTR之王":
-            user_id = await asyncio.to_thread(self.service.db.get_most_download_user_id_by_tag, "NTR")
-            if user_id is None:
-                yield event.plain_result(f"哎呀！没有找到【NTR】指数最高的用户");
-                return
-            user = await asyncio.to_thread(self.service.db.get_user_by_id, user_id)
-            yield event.plain_result(f"噔噔噔！⭐️截止今天，【NTR】指数最高的用户是{user.UserName}[{user.UserId}]")
-        elif action == "最爱开大车":
-            user_id = await asyncio.to_thread(self.service.db.get_most_download_user_id_by_tag, "年上")
+        elif action in _STAT_TAG_MAP:
+            tag, label = _STAT_TAG_MAP[action]
+            user_id = await asyncio.to_thread(self.service.db.get_most_download_user_id_by_tag, tag)
             if user_id is None:
-                yield event.plain_result(f"哎呀！没有找到【最爱开大车】指数最高的用户")
+                yield event.plain_result(f"哎呀！没有找到【{label}】指数最高的用户")
                 return
             user = await asyncio.to_thread(self.service.db.get_user_by_id, user_id)
-            yield event.plain_result(f"噔噔噔！⭐️截止今天，【最爱开大车】指数最高的用户是{user.UserName}[{user.UserId}]")
-        elif action == "骨科":
-            user_id = await asyncio.to_thread(self.service.db.get_most_download_user_id_by_tag, "乱伦")
-            if user_id is None:
-                yield event.plain_result(f"哎呀！没有找到【骨科】指数最高的用户")
-                return
-            user = await asyncio.to_thread(self.service.db.get_user_by_id, user_id)
-            yield event.plain_result(f"噔噔噔！⭐️截止今天，【骨科】指数最高的用户是{user.UserName}[{user.UserId}]")
-        elif action == "炼铜":
-            user_id = await asyncio.to_thread(self.service.db.get_most_download_user_id_by_tag, "萝莉")
-            if user_id is None:
-                yield event.plain_result(f"哎呀！没有找到【炼铜】指数最高的用户")
-                return
-            user = await asyncio.to_thread(self.service.db.get_user_by_id, user_id)
-            yield event.plain_result(f"噔噔噔！⭐️截止今天，【炼铜】指数最高的用户是{user.UserName}[{user.UserId}]")
+            yield event.plain_result(f"噔噔噔！⭐️截止今天，【{label}】指数最高的用户是{user.UserName}[{user.UserId}]")
         elif action == "自定义":
             custom_tag = args[2]
             user_id = await asyncio.to_thread(self.service.db.get_most_download_user_id_by_tag, custom_tag)
@@ -399,21 +364,12 @@ class JMCosmosPlugin(Star):
             user = await asyncio.to_thread(self.service.db.get_user_by_id, user_id)
             yield event.plain_result(f"噔噔噔！⭐️截止今天，【{custom_tag}】指数最高的用户是{user.UserName}[{user.UserId}]")
         else:
-            yield event.plain_result(
-                "用法:\n/jmstat 最多下载用户\n "
-                "/jmstat 最多下载漫画\n"
-                "/jmstat 妹控\n"
-                "/jmstat NTR之王\n"
-                "/jmstat 最爱开大车\n"
-                "/jmstat 骨科\n"
-                "/jmstat 炼铜\n"
-                "/jmstat 自定义 [自定义TAG]"
-            )
+            yield event.plain_result(_JMSTAT_USAGE)
 
     @filter.command("jmauthor")
     async def cmd_author(self, event: AstrMessageEvent):
         """搜索作者作品: /jmauthor [作者名] [数量]"""
-        parts = event.message_str.strip().split()
+        parts = _split_args(event)
         if len(parts) < 3:
             yield event.plain_result("用法: /jmauthor [作者名] [数量]\n例如: /jmauthor 水龙敬 5")
             return
@@ -445,16 +401,16 @@ class JMCosmosPlugin(Star):
             if info:
                 components = [Plain(f"🎨 作者 {author_name} 的最新作品:\n\n" + info.to_display_string())]
                 if self.cfg.show_cover and cover_path:
-                    components.append(Image.fromFileSystem(cover_path))
+                    components.append(await asyncio.to_thread(_cover_image_for, cover_path))
                 yield event.chain_result(components)
                 return
 
         # 逻辑：如果请求多部，显示列表
-        msg_lines = [f"🎨 作者 {author_name} 共有 {total} 部作品 (显示前 {len(results)} 部):"]
-        for i, (cid, title) in enumerate(results):
-            msg_lines.append(f"{i + 1}. 🆔{cid}: {title}")
-
-        yield event.plain_result("\n".join(msg_lines))
+        header = f"🎨 作者 {author_name} 共有 {total} 部作品 (显示前 {len(results)} 部):"
+        body = "\n".join(
+            f"{i}. 🆔{cid}: {title}" for i, (cid, title) in enumerate(results, start=1)
+        )
+        yield event.plain_result(f"{header}\n{body}")
 
     @filter.command("jmblackin")
     async def cmd_black_in(self, event: AstrMessageEvent, comic_id:str):
@@ -472,7 +428,7 @@ class JMCosmosPlugin(Star):
     @filter.command("jmhis")
     async def cmd_history(self, event: AstrMessageEvent):
         """查询下载历史: /jmhis [ID]"""
-        args = event.message_str.strip().split()
+        args = _split_args(event, maxsplit=2)
         if len(args) < 2:
             yield event.plain_result("请提供漫画ID，例如：/jmhis 12345")
             return
@@ -1,10 +1,15 @@
 import os
 import re
+import sys
+import time
+import types
 
 import yaml
 import traceback
 import asyncio
 import concurrent.futures
+import itertools
+from collections import OrderedDict
 from typing import Optional, List, Tuple, Set
 from threading import Lock
 
@@ -12,26 +17,50 @@ import jmcomic
 from astrbot.api import logger
 from jmcomic import JmMagicConstants
 
+# 优先使用 LibYAML 的 C 实现，未安装时回退纯 Python 实现
+try:
+    from yaml import CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
+    logger.warning("LibYAML 不可用，YAML 序列化回退到纯 Python 实现")
+
 from .config import PluginConfig
 from .models import ComicInfo
 from .storage import StorageManager
 
+# 漫画目录查找结果的缓存有效期（秒）
+_FOLDER_CACHE_TTL = 30.0
+# 专辑详情 LRU 缓存上限
+_ALBUM_CACHE_MAX = 64
+# 总页数 LRU 缓存上限
+_PAGES_CACHE_MAX = 256
+
+# jmcomic 解析失败时抛出的特征错误文本，集中定义避免各处散落字面量
+FIELD_MISMATCH_MARKER = sys.intern("文本没有匹配上字段")
+
+
+def is_site_changed_error(error_msg: str) -> bool:
+    """判断错误信息是否为网站结构变更导致的解析失败"""
+    return FIELD_MISMATCH_MARKER in error_msg
+
+
+# 备用标题解析的正则，模块加载时编译一次
+_TITLE_PATTERNS = tuple(re.compile(p) for p in (
+    r"<h1[^>]*>([^<]+)</h1>",
+    r"<title>([^<]+)</title>",
+    r'name:\s*[\'"]([^\'"]+)[\'"]',
+    r'"name":\s*"([^"]+)"',
+    r'data-title=[\'"]([^\'"]+)[\'"]',
+))
+
+
 # 添加自定义解析函数用于处理jmcomic库无法解析的情况
 def extract_title_from_html(html_content: str) -> str:
     """从HTML内容中提取标题的多种尝试方法"""
-    # 使用多种模式进行正则匹配
-    patterns = [
-        r"<h1[^>]*>([^<]+)</h1>",
-        r"<title>([^<]+)</title>",
-        r'name:\s*[\'"]([^\'"]+)[\'"]',
-        r'"name":\s*"([^"]+)"',
-        r'data-title=[\'"]([^\'"]+)[\'"]',
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, html_content)
-        if matches:
-            title = matches[0].strip()
+    for pattern in _TITLE_PATTERNS:
+        match = pattern.search(html_content)
+        if match:
+            title = match.group(1).strip()
             logger.info(f"已使用备用解析方法找到标题: {title}")
             return title
 
@@ -40,6 +69,15 @@ def extract_title_from_html(html_content: str) -> str:
 class JMProvider:
     """负责与 jmcomic 库交互，不包含任何 AstrBot 逻辑"""
 
+    # 固定请求头（只读视图，防止构建 option 时被意外改写），Referer 随配置域名变化，构建时单独补充
+    _DEFAULT_HEADERS = types.MappingProxyType({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        "Connection": "keep-alive",
+        "Cache-Control": "max-age=0",
+    })
+
     def __init__(self, config: PluginConfig, storage: StorageManager):
         self.config = config
         self.storage = storage
@@ -49,8 +87,22 @@ class JMProvider:
             thread_name_prefix="jm_worker"
         )
         self.downloading_covers: Set[str] = set()
-        self._download_lock = Lock()
-        self._active_downloads = set()
+        self._client_lock = Lock()
+        # 限制同时进入线程池的整本下载数，排队任务只占一个 await，不占线程
+        self._download_sem = asyncio.Semaphore(max(1, min(config.max_threads, 4)))
+        # comic_id -> 进行中的下载 Future，并发请求同一本子时共享结果
+        self._inflight = {}
+        # comic_id -> (缓存时间, 目录路径)，避免重复扫描 downloads 目录
+        self._folder_cache = {}
+        # (目录mtime, [(名称, 路径)])，downloads 未变化时查找零 readdir
+        self._downloads_index = None
+        # album_id -> 总页数，有界 LRU，重复查询直接命中
+        self._pages_cache = OrderedDict()
+        # comic_id -> album 详情，有界 LRU，详情与封面共用同一次网络请求
+        self._album_cache = OrderedDict()
+        # 常用目录路径，启动时算好，避免每次请求都查 dict 再 join
+        self._downloads_dir = storage.dirs["downloads"]
+        self._covers_dir = storage.dirs["covers"]
 
         # 初始化 jmcomic 配置
         self.option = self._init_option()
@@ -68,12 +120,8 @@ class JMProvider:
                     "meta_data": {
                         "proxies": {"https": self.config.proxy} if self.config.proxy else None,
                         "headers": {
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
-                            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-                            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+                            **self._DEFAULT_HEADERS,
                             "Referer": f"https://{self.config.domain_list[0]}/",
-                            "Connection": "keep-alive",
-                            "Cache-Control": "max-age=0",
                         },
                     }
                 }
@@ -111,7 +159,10 @@ class JMProvider:
         }
         logger.info(f"download存储目录: {download_dir}")
         logger.info(f"pdf存储目录: {pdf_dir}")
-        yaml_str = yaml.safe_dump(option_dict, allow_unicode=True)
+        # 优先直接用 dict 构建，省掉 dict→yaml→解析 的往返
+        if hasattr(jmcomic, "create_option_by_dict"):
+            return jmcomic.create_option_by_dict(option_dict)
+        yaml_str = yaml.dump(option_dict, Dumper=_YamlDumper, allow_unicode=True)
         # 应用配置
         return jmcomic.create_option_by_str(yaml_str)
 
@@ -131,21 +182,60 @@ class JMProvider:
             logger.error(f"JMComic 登录失败: {e}")
             return False
 
+    def _get_client(self):
+        """获取长期持有的客户端，未初始化时惰性创建并登录（双重检查避免并发重复建连）"""
+        if not self.client:
+            with self._client_lock:
+                if not self.client:
+                    self.login()
+        return self.client
+
+    def _get_album_cached(self, client, comic_id: str):
+        """按 comic_id 缓存 get_album_detail 结果，jminfo 后紧跟下载时省一次往返"""
+        key = str(comic_id)
+        album = self._album_cache.get(key)
+        if album is not None:
+            self._album_cache.move_to_end(key)
+            return album
+        album = client.get_album_detail(comic_id)
+        if album is not None:
+            self._album_cache[key] = album
+            if len(self._album_cache) > _ALBUM_CACHE_MAX:
+                self._album_cache.popitem(last=False)
+        return album
+
     def get_total_pages(self, album) -> int:
-        """获取漫画总页数"""
+        """获取漫画总页数（章节详情并发获取，结果按专辑ID缓存）"""
+        album_id = str(album.album_id)
+        cached = self._pages_cache.get(album_id)
+        if cached is not None:
+            self._pages_cache.move_to_end(album_id)
+            return cached
         try:
-            return sum(len(self.client.get_photo_detail(p.photo_id, False)) for p in album)
+            client = self._get_client()
+            photo_ids = [p.photo_id for p in album]
+            if len(photo_ids) == 1:
+                # 单章本子占大多数，直接取详情，省掉线程池调度
+                total = len(client.get_photo_detail(photo_ids[0], False))
+            else:
+                counts = self._thread_pool.map(
+                    lambda pid: len(client.get_photo_detail(pid, False)), photo_ids
+                )
+                total = sum(counts)
+            self._pages_cache[album_id] = total
+            if len(self._pages_cache) > _PAGES_CACHE_MAX:
+                self._pages_cache.popitem(last=False)
+            return total
         except Exception as e:
             logger.error(f"获取总页数失败: {str(e)}")
             return 0
 
     def get_comic_detail(self, comic_id: str) -> Optional[ComicInfo]:
         """获取漫画详情并转换为标准 Model"""
-        if not self.client:
-            self.login()
+        client = self._get_client()
 
         try:
-            album = self.client.get_album_detail(comic_id)
+            album = self._get_album_cached(client, comic_id)
 
             # 计算总页数
             total_pages = 0
@@ -153,7 +243,7 @@ class JMProvider:
                 # 注意：这可能会触发网络请求，视库的实现而定
                 # 简单实现：只统计章节数，或者需要遍历章节统计图片
                 total_pages = self.get_total_pages(album)
-            except:
+            except Exception:
                 pass
 
             return ComicInfo(
@@ -169,8 +259,17 @@ class JMProvider:
             # 原代码中的 retry/fallback 逻辑应该封装在这里
             return None
 
-    def download_cover(self, album_id: str) -> Tuple[bool, str]:
-        """下载漫画封面"""
+    def download_cover(self, album_id: str, force: bool = False) -> Tuple[bool, str]:
+        """下载漫画封面；force=True 时忽略已有文件强制刷新"""
+        cover_path = os.path.join(self._covers_dir, f"{album_id}.jpg")
+        if not force:
+            # 磁盘已有完好封面时，一次 stat 校验后直接复用
+            try:
+                if os.stat(cover_path).st_size >= 1000:
+                    return True, cover_path
+            except FileNotFoundError:
+                pass
+
         logger.info(f"检索下载队列: {self.downloading_covers}")
 
         if album_id in self.downloading_covers:
@@ -178,10 +277,11 @@ class JMProvider:
         logger.info(f"下载漫画封面任务生成: {album_id}")
         self.downloading_covers.add(album_id)
         try:
+            client = self._get_client()
             # 记录在对应ID下载封面
             logger.info(f"开始下载漫画封面，ID: {album_id}")
             try:
-                album = self.client.get_album_detail(album_id)
+                album = self._get_album_cached(client, album_id)
                 if not album:
                     return False, "漫画不存在"
 
@@ -192,10 +292,10 @@ class JMProvider:
                 error_msg = str(e)
                 logger.error(f"获取漫画详情失败: {error_msg}")
 
-                if "文本没有匹配上字段" in error_msg and "pattern:" in error_msg:
+                if is_site_changed_error(error_msg) and "pattern:" in error_msg:
                     # 尝试手动解析HTML
                     try:
-                        html_content = self.client._postman.get_html(
+                        html_content = client._postman.get_html(
                             f"https://{self.config.domain_list[0]}/album/{album_id}"
                         )
                         title = extract_title_from_html(html_content)
@@ -209,22 +309,19 @@ class JMProvider:
                 return False, f"获取漫画详情失败: {error_msg}"
 
             first_photo = album[0]
-            photo = self.client.get_photo_detail(first_photo.photo_id, True)
+            photo = client.get_photo_detail(first_photo.photo_id, True)
             if not photo:
                 return False, "章节内容为空"
 
             image = photo[0]
 
-            # 使用独立的封面目录保存封面
-            cover_path = os.path.join(
-                self.storage.dirs.get("covers"), f"{album_id}.jpg"
-            )
-
-            # 删除可能存在的旧封面，强制更新
-            if os.path.exists(cover_path):
+            # 仅在强制刷新时删除旧封面
+            if force:
                 try:
                     os.remove(cover_path)
                     logger.info(f"已删除旧封面: {cover_path}")
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
                     logger.error(f"删除旧封面失败: {str(e)}")
 
@@ -234,15 +331,15 @@ class JMProvider:
 
             # 下载封面到封面专用目录
             logger.info(f"下载封面到: {cover_path}")
-            self.client.download_by_image_detail(image, cover_path)
+            client.download_by_image_detail(image, cover_path)
 
-            # 验证封面是否已下载
-            if os.path.exists(cover_path):
-                file_size = os.path.getsize(cover_path)
+            # 验证封面是否已下载（一次 stat 同时拿到存在性和大小）
+            try:
+                file_size = os.stat(cover_path).st_size
                 logger.info(f"封面下载成功: {cover_path}, 大小: {file_size} 字节")
                 if file_size < 1000:  # 如果文件太小，可能下载失败
                     logger.warning(f"封面文件大小异常，可能下载失败: {file_size} 字节")
-            else:
+            except FileNotFoundError:
                 logger.error(f"封面下载后未找到文件: {cover_path}")
 
             return True, cover_path
@@ -250,7 +347,7 @@ class JMProvider:
             error_msg = str(e)
             logger.error(f"封面下载失败: {error_msg}")
 
-            if "文本没有匹配上字段" in error_msg:
+            if is_site_changed_error(error_msg):
                 return (
                     False,
                     "封面下载失败: 网站结构可能已更改，请更新jmcomic库",
@@ -261,31 +358,48 @@ class JMProvider:
             self.downloading_covers.discard(album_id)
 
     async def download_comic_async(self, comic_id: str) -> Tuple[bool, str]:
-        """异步下载漫画入口"""
-        if comic_id in self._active_downloads:
-            return False, "该漫画正在下载中"
+        """异步下载漫画入口；同一本子的并发请求挂到同一个 Future 上等结果"""
+        existing = self._inflight.get(comic_id)
+        if existing is not None:
+            return await asyncio.shield(existing)
 
-        with self._download_lock:
-            self._active_downloads.add(comic_id)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[comic_id] = future
+        try:
+            result = await self._download_comic_impl(comic_id)
+            future.set_result(result)
+            return result
+        except BaseException:
+            # 实现层不抛业务异常，这里只会是取消等情况；兜底唤醒等待方
+            if not future.done():
+                future.set_result((False, "下载异常终止"))
+            raise
+        finally:
+            self._inflight.pop(comic_id, None)
 
+    async def _download_comic_impl(self, comic_id: str) -> Tuple[bool, str]:
+        """实际的下载流程，始终以 (成功与否, 信息) 返回"""
         try:
             loop = asyncio.get_running_loop()
-            # 在线程池中执行阻塞的下载任务
-            await loop.run_in_executor(
-                self._thread_pool,
-                self._download_sync,
-                comic_id
-            )
+            # 在线程池中执行阻塞的下载任务；信号量避免整本下载占满线程池
+            async with self._download_sem:
+                await loop.run_in_executor(
+                    self._thread_pool,
+                    self._download_sync,
+                    comic_id
+                )
+            # 下载产生了新目录，清理缓存让下次查找拿到最新路径
+            self._folder_cache.pop(comic_id, None)
             return True, "下载完成"
         except Exception as e:
             error_msg = f"下载异常: {str(e)}"
             logger.error(error_msg)
             if self.config.debug_mode:
-                self.storage.save_debug_log(f"err_{comic_id}", traceback.format_exc())
+                # 写日志是阻塞文件 IO，放到线程执行
+                await asyncio.to_thread(
+                    self.storage.save_debug_log, f"err_{comic_id}", traceback.format_exc()
+                )
             return False, error_msg
-        finally:
-            with self._download_lock:
-                self._active_downloads.discard(comic_id)
 
     def _download_sync(self, comic_id: str):
         """同步下载逻辑 (运行在线程池中)"""
@@ -294,10 +408,10 @@ class JMProvider:
 
     def search_site(self, query: str, page: int = 1) -> List[Tuple[str, str]]:
         """搜索"""
-        if not self.client: self.login()
+        client = self._get_client()
         try:
             # 返回 [(id, title), ...]
-            resp = self.client.search_site(query, page=page)
+            resp = client.search_site(query, page=page)
             return list(resp.iter_id_title())
         except Exception as e:
             logger.error(f"搜索失败: {e}")
@@ -307,96 +421,121 @@ class JMProvider:
         self._thread_pool.shutdown(wait=False)
 
     def search_author_works(self, author_name: str, limit: int = 5) -> Tuple[int, List[Tuple[str, str]]]:
-        """搜索作者作品，支持自动翻页直到满足 limit 数量"""
-        if not self.client: self.login()
-
-        all_results = []
-        total_count = 0
-        current_page = 1
+        """搜索作者作品，首页确定总量后其余页并发获取"""
+        client = self._get_client()
+
+        def fetch_page(page: int):
+            # 使用 ORDER_BY_LATEST 确保按最新排序
+            resp = client.search_site(
+                search_query=author_name,
+                page=page,
+                order_by=JmMagicConstants.ORDER_BY_LATEST
+            )
+            return resp
 
         try:
             logger.info(f"正在搜索作者: {author_name}, 目标数量: {limit}")
-            while len(all_results) < limit:
-                # 使用 ORDER_BY_LATEST 确保按最新排序
-                resp = self.client.search_site(
-                    search_query=author_name,
-                    page=current_page,
-                    order_by=JmMagicConstants.ORDER_BY_LATEST
-                )
-
-                if current_page == 1:
-                    total_count = resp.total
-                    if total_count == 0:
-                        break
-
-                page_results = list(resp.iter_id_title())
+            first = fetch_page(1)
+            total_count = first.total
+            if total_count == 0:
+                return 0, []
+
+            all_results = list(itertools.islice(first.iter_id_title(), limit))
+            # 首页已满足需求，或全站作品都在首页
+            if len(all_results) >= limit or len(all_results) >= total_count:
+                return total_count, all_results
+
+            # 首页未凑够说明已被取尽，其长度即为页大小，据此并发取剩余页
+            page_size = len(all_results)
+            if page_size == 0:
+                return total_count, all_results
+            remaining = min(limit, total_count) - len(all_results)
+            extra_pages = (remaining + page_size - 1) // page_size
+            page_lists = self._thread_pool.map(
+                lambda p: list(fetch_page(p).iter_id_title()),
+                range(2, 2 + extra_pages),
+            )
+            for page_results in page_lists:
                 if not page_results:
                     break
-
-                all_results.extend(page_results)
-
-                # 如果已经获取了所有存在的作品，停止翻页
-                if len(all_results) >= total_count:
+                all_results.extend(
+                    itertools.islice(page_results, limit - len(all_results)))
+                if len(all_results) >= limit:
                     break
 
-                current_page += 1
-
-            return total_count, all_results[:limit]
+            return total_count, all_results
         except Exception as e:
             logger.error(f"搜索作者失败: {e}")
             return 0, []
 
     def find_comic_folder(self, comic_id: str) -> str:
-        """查找漫画文件夹，支持多种命名方式"""
+        """查找漫画文件夹（带短时缓存），支持多种命名方式"""
+        hit = self._folder_cache.get(comic_id)
+        if hit and time.time() - hit[0] < _FOLDER_CACHE_TTL and os.path.exists(hit[1]):
+            return hit[1]
+        folder = self._locate_comic_folder(comic_id)
+        self._folder_cache[comic_id] = (time.time(), folder)
+        return folder
+
+    def _downloads_entries(self):
+        """downloads 下的子目录 (名称, 路径) 列表，按目录 mtime 缓存"""
+        try:
+            mtime = os.stat(self._downloads_dir).st_mtime_ns
+        except OSError:
+            return []
+        cached = self._downloads_index
+        if cached and cached[0] == mtime:
+            return cached[1]
+        entries = []
+        try:
+            with os.scandir(self._downloads_dir) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        entries.append((entry.name, entry.path))
+        except FileNotFoundError:
+            pass
+        self._downloads_index = (mtime, entries)
+        return entries
+
+    def _locate_comic_folder(self, comic_id: str) -> str:
+        """实际扫描 downloads 目录定位漫画文件夹"""
         logger.info(f"开始查找漫画ID {comic_id} 的文件夹")
 
         # 尝试直接匹配ID
-        id_path = os.path.join(self.storage.dirs.get("downloads"), str(comic_id))
+        id_path = os.path.join(self._downloads_dir, str(comic_id))
         if os.path.exists(id_path):
             logger.info(f"找到直接匹配的目录: {id_path}")
             return id_path
 
         # 尝试查找以漫画标题命名的目录
-        if os.path.exists(self.storage.dirs.get("downloads")):
-            # 首先尝试查找以ID开头或结尾的目录名，或者格式为 [ID]_title 的目录
-            exact_matches = []
-            partial_matches = []
-
-            for item in os.listdir(self.storage.dirs.get("downloads")):
-                item_path = os.path.join(self.storage.dirs.get("downloads"), item)
-                if not os.path.isdir(item_path):
-                    continue
-
-                # 精确匹配：目录名以ID开头或结尾，或者格式为 [ID]_title
-                if (
-                    item.startswith(str(comic_id) + "_")
-                    or item.endswith("_" + str(comic_id))
-                    or item.startswith("[" + str(comic_id) + "]")
-                    or item == str(comic_id)
-                ):
-                    exact_matches.append(item_path)
-                    logger.info(f"找到精确匹配的漫画目录: {item_path}")
-                # 部分匹配：目录名包含ID但不是精确格式
-                elif str(comic_id) in item:
-                    # 进一步验证：确保是完整的ID匹配，而不是部分匹配
-                    # 使用正则表达式确保ID是独立的数字
-                    import re
-
-                    pattern = r"\b" + re.escape(str(comic_id)) + r"\b"
-                    if re.search(pattern, item):
-                        partial_matches.append(item_path)
-                        logger.info(f"找到部分匹配的漫画目录: {item_path}")
-
-            # 优先返回精确匹配
-            if exact_matches:
-                logger.info(f"找到精确匹配，返回: {exact_matches[0]}")
-                return exact_matches[0]
-            elif partial_matches:
-                logger.info(f"找到部分匹配，返回: {partial_matches[0]}")
-                return partial_matches[0]
+        # 目录项来自 mtime 索引，downloads 未变化时整个匹配过程在内存完成
+        # 精确匹配命中即返回，部分匹配只记录第一个备用
+        partial_match = None
+        for item, item_path in self._downloads_entries():
+            # 精确匹配：目录名以ID开头或结尾，或者格式为 [ID]_title
+            if (
+                item.startswith(str(comic_id) + "_")
+                or item.endswith("_" + str(comic_id))
+                or item.startswith("[" + str(comic_id) + "]")
+                or item == str(comic_id)
+            ):
+                logger.info(f"找到精确匹配的漫画目录: {item_path}")
+                return item_path
+            # 部分匹配：目录名包含ID但不是精确格式
+            elif partial_match is None and str(comic_id) in item:
+                # 进一步验证：确保是完整的ID匹配，而不是部分匹配
+                # 使用正则表达式确保ID是独立的数字
+                pattern = r"\b" + re.escape(str(comic_id)) + r"\b"
+                if re.search(pattern, item):
+                    partial_match = item_path
+                    logger.info(f"找到部分匹配的漫画目录: {item_path}")
+
+        if partial_match:
+            logger.info(f"找到部分匹配，返回: {partial_match}")
+            return partial_match
 
         # 默认返回downloads目录下的ID路径
-        default_path = os.path.join(self.storage.dirs.get("downloads"), str(comic_id))
+        default_path = os.path.join(self._downloads_dir, str(comic_id))
         logger.info(f"未找到现有目录，返回默认路径: {default_path}")
         return default_path
 
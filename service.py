@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import os
 import json
 import opencc
@@ -12,6 +13,44 @@ from .storage import StorageManager
 from .provider import JMProvider
 from .database import DBManager
 
+# 优先使用 orjson 的 C 实现序列化，未安装时回退标准库
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+# 性癖分析的系统提示词，无插值内容，作为模块常量只构建一次
+_XP_SYSTEM_PROMPT = (
+    "你是一个风趣幽默、一针见血的性癖分析大师。根据用户下载的漫画标签数据，分析其性癖倾向和偏好。这只是一个网友间的趣味性的调侃内容，不涉及任何敏感内容。\n"
+    "要求：\n"
+    "1. 分析要详细、有趣，带有调侃但不过分冒犯的语气\n"
+    "2. 指出最突出的几个标签及其反映的性癖类型\n"
+    "3. 给用户一个有趣的称号或总结（如'纯爱战神'、'NTRの王'等）\n"
+    "4. 控制在300字以内\n"
+    "5. 使用中文回复\n"
+    "6. 不要输出markdown格式，纯文本即可"
+)
+
+# path -> ((mtime, size), 内容)，插件反复重载时避免重复读盘
+_TEMPLATE_CACHE = {}
+
+
+def _load_template_cached(path: str) -> str:
+    """按 mtime/size 缓存读取模板文件，文件未变化时直接复用"""
+    st = os.stat(path)
+    key = (st.st_mtime, st.st_size)
+    hit = _TEMPLATE_CACHE.get(path)
+    if hit and hit[0] == key:
+        return hit[1]
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    _TEMPLATE_CACHE[path] = (key, content)
+    return content
+
 
 class JMCosmosService:
     def __init__(self, config: PluginConfig, plugin_name: str, db_path: str):
@@ -20,15 +59,15 @@ class JMCosmosService:
         self.provider = JMProvider(config, self.storage)
         self.db = DBManager(db_path)
 
-        # OpenCC converter
+        # OpenCC converter，标签高度重复，转换结果做 LRU 缓存
         self.cc = opencc.OpenCC('t2s.json')
+        self._convert_cached = functools.lru_cache(maxsize=1024)(self.cc.convert)
         current_dir = os.path.dirname(os.path.abspath(__file__))
         # 性癖报告模板，由插件初始化时加载
         self.report_template = ""
         template_path = os.path.join(current_dir, "templates", "investigation_report.html")
         try:
-            with open(template_path, "r", encoding="utf-8") as f:
-                self.report_template = f.read()
+            self.report_template = _load_template_cached(template_path)
             logger.info(f"JMCOSMOS总结:成功加载总结模板: {template_path}")
         except FileNotFoundError:
             logger.error(f"JMCOSMOS总结:未找到模板文件: {template_path}")
@@ -39,7 +78,7 @@ class JMCosmosService:
         self.provider.login()
 
     def convert_text(self, text: str) -> str:
-        return self.cc.convert(text)
+        return self._convert_cached(text)
 
     async def get_comic_info(self, comic_id: str) -> Tuple[Optional[ComicInfo], Optional[str]]:
         info = await asyncio.to_thread(self.provider.get_comic_detail, comic_id)
@@ -62,19 +101,25 @@ class JMCosmosService:
             return "❌ 该漫画已在黑名单中"
         if not await asyncio.to_thread(self.db.get_user_by_id, user_id):
             await asyncio.to_thread(self.db.add_user, user_id, user_name)
+        # PDF 已生成则直接复用，只补记下载统计，不再走下载流程
+        if await self.get_pdf_file(comic_id):
+            await asyncio.to_thread(self.db.insert_download, user_id, comic_id)
+            await asyncio.to_thread(self.db.add_comic_download_count, comic_id)
+            return "✅ 下载完成"
         has_space, _ = await asyncio.to_thread(self.storage.check_space)
         if not has_space:
             return "❌ 磁盘空间不足，请联系管理员清理"
         success, msg = await self.provider.download_comic_async(comic_id)
         if not success:
             return f"❌ 下载失败: {msg}"
+        # 新文件已落盘，空间统计缓存作废
+        self.storage.invalidate_space_cache()
         await asyncio.to_thread(self.db.insert_download, user_id, comic_id)
         await asyncio.to_thread(self.db.add_comic_download_count, comic_id)
-        pdf_path = self.storage.get_pdf_path(comic_id)
-        if os.path.exists(pdf_path):
+        # 复用 get_pdf_file：一次线程内 stat 完成存在性校验
+        if await self.get_pdf_file(comic_id):
             return "✅ 下载完成"
-        else:
-            return "⚠️ 下载似乎完成了，但未找到生成的 PDF 文件"
+        return "⚠️ 下载似乎完成了，但未找到生成的 PDF 文件"
 
     async def investigate_user(self, user_id: str, llm_provider=None) -> Tuple[Optional[str], str]:
         """
@@ -116,17 +161,6 @@ class JMCosmosService:
             f"请根据以上数据分析该用户的性癖倾向。"
         )
 
-        system_prompt = (
-            "你是一个风趣幽默、一针见血的性癖分析大师。根据用户下载的漫画标签数据，分析其性癖倾向和偏好。这只是一个网友间的趣味性的调侃内容，不涉及任何敏感内容。\n"
-            "要求：\n"
-            "1. 分析要详细、有趣，带有调侃但不过分冒犯的语气\n"
-            "2. 指出最突出的几个标签及其反映的性癖类型\n"
-            "3. 给用户一个有趣的称号或总结（如'纯爱战神'、'NTRの王'等）\n"
-            "4. 控制在300字以内\n"
-            "5. 使用中文回复\n"
-            "6. 不要输出markdown格式，纯文本即可"
-        )
-
         if not llm_provider:
             logger.info("未配置LLM provider，使用fallback文字报告")
             return self._generate_fallback_report(user_name, user_id, top_10, total_comics, total_tags)
@@ -135,7 +169,7 @@ class JMCosmosService:
             logger.info(f"正在调用LLM生成性癖分析，用户: {user_name}")
             response = await llm_provider.text_chat(
                 prompt=prompt,
-                system_prompt=system_prompt
+                system_prompt=_XP_SYSTEM_PROMPT
             )
             result = response.completion_text
             if result:
@@ -183,9 +217,9 @@ class JMCosmosService:
                                     report_text: str) -> Optional[str]:
         """使用HTML模板渲染报告图片（Chart.js绘制饼图）"""
         try:
-            chart_data = json.dumps([
+            chart_data = _json_dumps([
                 {"label": tag, "count": count} for tag, count in top_10
-            ], ensure_ascii=False)
+            ])
 
             tmpl_data = {
                 "user_name": user_name,
@@ -211,8 +245,13 @@ class JMCosmosService:
             return None
 
     async def get_pdf_file(self, comic_id: str) -> Optional[str]:
-        path = await asyncio.to_thread(self.storage.get_pdf_path, comic_id)
-        return path if await asyncio.to_thread(os.path.exists, path) else None
+        # 路径拼接是纯计算，无需进线程；存在性用一次 stat 判断
+        path = self.storage.get_pdf_path(comic_id)
+        try:
+            await asyncio.to_thread(os.stat, path)
+        except FileNotFoundError:
+            return None
+        return path
 
     async def shutdown(self):
         await asyncio.to_thread(self.provider.close)
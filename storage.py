@@ -1,11 +1,15 @@
 import os
 import shutil
 import time
+from contextlib import suppress
 from datetime import datetime
 from typing import List, Tuple
 from astrbot.api.star import StarTools
 from astrbot.api import logger
 
+# 空间统计缓存有效期（秒），期间未写入磁盘时免于重复全盘扫描
+_SPACE_CACHE_TTL = 5.0
+
 
 class StorageManager:
     def __init__(self, plugin_name: str):
@@ -19,6 +23,9 @@ class StorageManager:
         }
         self._init_dirs()
         self.max_storage_size = 8 * 1024 * 1024 * 1024  # 8GB (原代码是2GB，这里调整看需求)
+        # (是否有空间, 已用MB) 的短时缓存，下载落盘后主动失效
+        self._space_cache = None
+        self._space_cache_ts = 0.0
 
     def _init_dirs(self):
         for path in self.dirs.values():
@@ -41,26 +48,51 @@ class StorageManager:
 
     def clear_covers(self) -> int:
         count = 0
-        for f in os.listdir(self.dirs["covers"]):
-            try:
-                os.remove(os.path.join(self.dirs["covers"], f))
-                count += 1
-            except Exception:
-                pass
+        with os.scandir(self.dirs["covers"]) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    with suppress(OSError):
+                        os.unlink(entry.path)
+                        count += 1
         return count
 
+    def invalidate_space_cache(self):
+        """磁盘内容变化后调用，强制下次 check_space 重新扫描"""
+        self._space_cache = None
+
     def check_space(self) -> Tuple[bool, float]:
         """返回 (是否有空间, 已用空间MB)"""
+        if self._space_cache is not None and time.time() - self._space_cache_ts < _SPACE_CACHE_TTL:
+            return self._space_cache
+
+        # scandir 迭代：类型与大小直接取自目录项缓存，免去逐文件 stat
         total_size = 0
-        for root, _, files in os.walk(self.base_dir):
-            for f in files:
-                total_size += os.path.getsize(os.path.join(root, f))
+        pending = [self.base_dir]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            with suppress(OSError):
+                                total_size += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
 
-        return total_size < self.max_storage_size, total_size / (1024 * 1024)
+        result = (total_size < self.max_storage_size, total_size / (1024 * 1024))
+        self._space_cache = result
+        self._space_cache_ts = time.time()
+        return result
 
     def save_debug_log(self, prefix: str, content: str):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         path = self.get_path("logs", f"{prefix}_{timestamp}.txt")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
+        # 日志体量小，编码一次后用裸 fd 单次写入，省掉文本缓冲层
+        data = content.encode("utf-8")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
         return path
\ No newline at end of file
@@ -2,33 +2,42 @@ import os
 import re
 import time
 import opencc
+from contextlib import suppress
 from astrbot.api.star import StarTools
 from astrbot.api import logger
 
 
 
 # --- 验证工具 ---
+# 校验与标题解析的正则在模块加载时编译一次，避开 re 模块的小缓存查找
+_COMIC_ID_RE = re.compile(r"^\d+$")
+# 长度上限通过前瞻并入模式，fullmatch 一次完成全部校验
+_DOMAIN_RE = re.compile(
+    r"(?=.{1,253}$)"
+    r"[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*"
+)
+_TITLE_PATTERNS = tuple(re.compile(p) for p in (
+    r"<h1[^>]*>([^<]+)</h1>",
+    r"<title>([^<]+)</title>",
+    r'name:\s*[\'"]([^\'"]+)[\'"]',
+    r'"name":\s*"([^"]+)"',
+    r'data-title=[\'"]([^\'"]+)[\'"]',
+))
+
+
 def validate_comic_id(comic_id: str) -> bool:
-    return bool(re.match(r"^\d+$", comic_id)) and len(comic_id) <= 10
+    return bool(_COMIC_ID_RE.match(comic_id)) and len(comic_id) <= 10
 
 
 def validate_domain(domain: str) -> bool:
-    pattern = r"^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*$"
-    return bool(re.match(pattern, domain)) and len(domain) <= 253
+    return _DOMAIN_RE.fullmatch(domain) is not None
 
 
 def extract_title_from_html(html_content: str) -> str:
-    patterns = [
-        r"<h1[^>]*>([^<]+)</h1>",
-        r"<title>([^<]+)</title>",
-        r'name:\s*[\'"]([^\'"]+)[\'"]',
-        r'"name":\s*"([^"]+)"',
-        r'data-title=[\'"]([^\'"]+)[\'"]',
-    ]
-    for pattern in patterns:
-        matches = re.findall(pattern, html_content)
-        if matches:
-            return matches[0].strip()
+    for pattern in _TITLE_PATTERNS:
+        match = pattern.search(html_content)
+        if match:
+            return match.group(1).strip()
     return "未知标题"
 
 
@@ -74,54 +83,70 @@ class ResourceManager:
         if os.path.exists(direct_path):
             return direct_path
 
-        # 2. 模糊匹配
-        if os.path.exists(self.downloads_dir):
-            target_id = str(comic_id)
-            for item in os.listdir(self.downloads_dir):
-                item_path = os.path.join(self.downloads_dir, item)
-                if not os.path.isdir(item_path):
-                    continue
-
-                # 精确匹配模式
-                if (item.startswith(f"{target_id}_") or
-                        item.endswith(f"_{target_id}") or
-                        item == f"[{target_id}]"):
-                    return item_path
-
-                # 正则单词边界匹配
-                if re.search(r"\b" + re.escape(target_id) + r"\b", item):
-                    return item_path
+        # 2. 模糊匹配（scandir 单次遍历，目录判断不额外 stat）
+        target_id = str(comic_id)
+        id_pattern = re.compile(r"\b" + re.escape(target_id) + r"\b")
+        try:
+            with os.scandir(self.downloads_dir) as it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    item = entry.name
+
+                    # 精确匹配模式
+                    if (item.startswith(f"{target_id}_") or
+                            item.endswith(f"_{target_id}") or
+                            item == f"[{target_id}]"):
+                        return entry.path
+
+                    # 正则单词边界匹配（模式在循环外编译一次）
+                    if id_pattern.search(item):
+                        return entry.path
+        except FileNotFoundError:
+            pass
 
         return direct_path
 
+    def _iter_files(self):
+        """迭代 base_dir 下所有文件项；scandir 的目录项自带类型与 stat 缓存"""
+        pending = [self.base_dir]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+            except OSError:
+                continue
+
     def cleanup_old_files(self, days=30) -> int:
         cutoff = time.time() - (days * 86400)
         count = 0
-        for root, _, files in os.walk(self.base_dir):
-            for file in files:
-                path = os.path.join(root, file)
-                try:
-                    if os.path.getmtime(path) < cutoff:
-                        os.remove(path)
-                        count += 1
-                except Exception:
-                    pass
+        for entry in self._iter_files():
+            with suppress(OSError):
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    os.remove(entry.path)
+                    count += 1
         return count
 
     def check_storage_space(self, max_size_bytes=2 * 1024 * 1024 * 1024) -> bool:
         total_size = 0
-        for root, _, files in os.walk(self.base_dir):
-            for f in files:
-                total_size += os.path.getsize(os.path.join(root, f))
+        for entry in self._iter_files():
+            with suppress(OSError):
+                total_size += entry.stat(follow_symlinks=False).st_size
         return total_size < max_size_bytes
 
     def clear_cover_cache(self) -> int:
         count = 0
-        if os.path.exists(self.covers_dir):
-            for f in os.listdir(self.covers_dir):
-                try:
-                    os.remove(os.path.join(self.covers_dir, f))
-                    count += 1
-                except:
-                    pass
+        try:
+            with os.scandir(self.covers_dir) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        with suppress(OSError):
+                            os.unlink(entry.path)
+                            count += 1
+        except FileNotFoundError:
+            pass
         return count
\ No newline at end of file